@@ -0,0 +1,361 @@
+"""
+SysPet Admission Control
+Ограничение нагрузки на /api/feed: размер тела, token bucket на клиента
+и ограниченная очередь анализа в процессах-воркерах с таймаутом на задачу.
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from starlette.responses import JSONResponse
+
+# ===== НАСТРОЙКИ (переопределяются через переменные окружения) =====
+FEED_MAX_CONCURRENCY = int(os.environ.get("SYSPET_FEED_MAX_CONCURRENCY", "2"))
+FEED_MAX_QUEUE = int(os.environ.get("SYSPET_FEED_MAX_QUEUE", "8"))
+FEED_QUEUE_TIMEOUT = float(os.environ.get("SYSPET_FEED_QUEUE_TIMEOUT", "5.0"))
+FEED_JOB_TIMEOUT = float(os.environ.get("SYSPET_FEED_JOB_TIMEOUT", "3.0"))
+FEED_MAX_BODY = int(os.environ.get("SYSPET_FEED_MAX_BODY", str(1024 * 1024)))
+FEED_RATE = float(os.environ.get("SYSPET_FEED_RATE", "2.0"))  # Токенов в секунду на клиента
+FEED_BURST = float(os.environ.get("SYSPET_FEED_BURST", "5"))
+MAX_TRACKED_CLIENTS = 10000
+
+
+class AdmissionRejected(Exception):
+    """Запрос отклонён контролем нагрузки"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: Optional[int] = None):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """Забрать токен. Возвращает 0, если получилось, иначе сколько секунд ждать"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AnalysisError(RuntimeError):
+    """Исключение внутри задачи воркера; сам воркер остаётся рабочим"""
+
+
+def _worker_main(conn):
+    """Цикл процесса-воркера: получить (fn, args), вернуть (ok, результат)"""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        fn, args = job
+        try:
+            conn.send((True, fn(*args)))
+        except Exception as e:
+            conn.send((False, repr(e)))
+
+
+class AnalysisWorker:
+    """
+    Отдельный процесс со своим каналом.
+    В отличие от ProcessPoolExecutor, его можно убить, не ломая остальные задачи.
+    """
+
+    def __init__(self):
+        # spawn: fork многопоточного сервера небезопасен
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    async def call(self, fn: Callable[..., Any], args: tuple) -> Any:
+        """Выполнить задачу, ожидая ответ через event loop без блокировки"""
+        loop = asyncio.get_running_loop()
+        self.conn.send((fn, args))
+        ready = loop.create_future()
+        fd = self.conn.fileno()
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            loop.remove_reader(fd)
+        ok, value = self.conn.recv()  # EOFError, если воркер умер
+        if not ok:
+            raise AnalysisError(value)
+        return value
+
+    def kill(self):
+        self.process.kill()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+
+class FeedAdmission:
+    """
+    Контроллер нагрузки для кормления.
+    Анализ выполняется в пуле процессов: re держит GIL на всё время сопоставления,
+    поэтому потоки не защищают game loop и /api/state от тяжёлого кода.
+    Задача дольше job_timeout прерывается вместе со своим процессом-воркером;
+    задачи в остальных воркерах не затрагиваются.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = FEED_MAX_CONCURRENCY,
+        max_queue: int = FEED_MAX_QUEUE,
+        queue_timeout: float = FEED_QUEUE_TIMEOUT,
+        job_timeout: float = FEED_JOB_TIMEOUT,
+        max_body: int = FEED_MAX_BODY,
+        rate: float = FEED_RATE,
+        burst: float = FEED_BURST,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.job_timeout = job_timeout
+        self.max_body = max_body
+        self.rate = rate
+        self.burst = max(1.0, burst)
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._idle: List[AnalysisWorker] = []
+        self._workers: Set[AnalysisWorker] = set()
+        self._pending = 0  # В очереди + в работе
+        self._in_flight = 0
+        self._avg_service_time = 0.05  # EWMA времени анализа, для Retry-After
+
+        self.accepted = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.failed = 0
+        self.worker_restarts = 0
+        self.rejected: Counter = Counter()
+
+    # === РАЗМЕР ТЕЛА ===
+    def check_body_size(self, size: int):
+        if size > self.max_body:
+            self.rejected["body_too_large"] += 1
+            raise AdmissionRejected(413, f"Body too large (max {self.max_body} bytes)")
+
+    # === RATE LIMIT ===
+    def check_rate(self, client: str):
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_CLIENTS:
+                self._prune_buckets(now)
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+        wait = bucket.take(now)
+        if wait > 0:
+            self.rejected["rate_limited"] += 1
+            raise AdmissionRejected(429, "Rate limit exceeded", max(1, math.ceil(wait)))
+
+    def _prune_buckets(self, now: float):
+        """Выкинуть клиентов, чьи корзины уже снова полные"""
+        refill_time = self.burst / self.rate
+        self._buckets = {
+            client: bucket for client, bucket in self._buckets.items()
+            if now - bucket.updated < refill_time
+        }
+
+    # === ОЧЕРЕДЬ АНАЛИЗА ===
+    def _queue_retry_after(self) -> int:
+        waves = (self._pending + 1) / self.max_concurrency
+        return max(1, math.ceil(waves * self._avg_service_time))
+
+    def _take_worker(self) -> AnalysisWorker:
+        """Свободный воркер или новый; их не больше max_concurrency благодаря семафору"""
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive():
+                return worker
+            self._discard_worker(worker)
+        worker = AnalysisWorker()
+        self._workers.add(worker)
+        return worker
+
+    def _discard_worker(self, worker: AnalysisWorker):
+        """Убить воркер: зависшую задачу в процессе нельзя отменить иначе"""
+        self._workers.discard(worker)
+        worker.kill()
+        self.worker_restarts += 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполнить fn(*args) в пуле анализа, если очередь не переполнена.
+        fn и аргументы должны сериализоваться pickle (функция уровня модуля).
+        """
+        if self._pending >= self.max_concurrency + self.max_queue:
+            self.rejected["queue_full"] += 1
+            raise AdmissionRejected(429, "Analysis queue is full", self._queue_retry_after())
+
+        self._pending += 1
+        try:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected["queue_timeout"] += 1
+                raise AdmissionRejected(429, "Timed out waiting in analysis queue", self._queue_retry_after())
+
+            self.accepted += 1
+            self._in_flight += 1
+            started = time.monotonic()
+            worker = self._take_worker()
+            try:
+                result = await asyncio.wait_for(worker.call(fn, args), timeout=self.job_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                self._discard_worker(worker)
+                raise AdmissionRejected(422, f"Analysis took longer than {self.job_timeout}s")
+            except AnalysisError:
+                self.failed += 1
+                self._idle.append(worker)
+                raise
+            except (EOFError, OSError):
+                self.failed += 1
+                self._discard_worker(worker)
+                raise AdmissionRejected(503, "Analysis worker crashed", 1)
+            except BaseException:
+                # Отмена запроса посреди задачи: ответ в канале не дочитан
+                self._discard_worker(worker)
+                raise
+            finally:
+                elapsed = time.monotonic() - started
+                self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * elapsed
+                self._in_flight -= 1
+                self._semaphore.release()
+
+            self.completed += 1
+            self._idle.append(worker)
+            return result
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        for worker in self._workers:
+            if worker in self._idle:
+                worker.stop()
+            else:
+                worker.kill()
+        self._workers.clear()
+        self._idle.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "job_timeout": self.job_timeout,
+            "max_body": self.max_body,
+            "rate": self.rate,
+            "burst": self.burst,
+            "in_flight": self._in_flight,
+            "queue_depth": self._pending - self._in_flight,
+            "accepted": self.accepted,
+            "completed": self.completed,
+            "timed_out": self.timed_out,
+            "failed": self.failed,
+            "workers": len(self._workers),
+            "worker_restarts": self.worker_restarts,
+            "rejected": dict(self.rejected),
+            "rejected_total": sum(self.rejected.values()),
+            "avg_service_ms": round(self._avg_service_time * 1000, 2),
+            "tracked_clients": len(self._buckets),
+        }
+
+
+class FeedAdmissionMiddleware:
+    """
+    ASGI-middleware: отбрасывает слишком большие и слишком частые запросы
+    до того, как FastAPI начнёт разбирать форму.
+    """
+
+    def __init__(self, app, admission: FeedAdmission, path: str = "/api/feed"):
+        self.app = app
+        self.admission = admission
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_key = client[0] if client else "unknown"
+        try:
+            content_length = dict(scope["headers"]).get(b"content-length")
+            if content_length is not None and content_length.isdigit():
+                self.admission.check_body_size(int(content_length))
+            self.admission.check_rate(client_key)
+        except AdmissionRejected as e:
+            await self._reject(e, scope, receive, send)
+            return
+
+        # Тело без Content-Length (chunked) читаем с ограничением и отдаём приложению повторно
+        messages = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return  # Клиент отключился
+            size += len(message.get("body", b""))
+            try:
+                self.admission.check_body_size(size)
+            except AdmissionRejected as e:
+                await self._reject(e, scope, receive, send)
+                return
+            messages.append(message)
+            if not message.get("more_body", False):
+                break
+
+        async def replay_receive():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        await self.app(scope, replay_receive, send)
+
+    @staticmethod
+    async def _reject(error: AdmissionRejected, scope, receive, send):
+        response = JSONResponse({"detail": error.reason}, status_code=error.status_code, headers=error.headers())
+        await response(scope, receive, send)
+
+
+# ===== ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР =====
+feed_admission = FeedAdmission()
@@ -48,8 +48,8 @@ ENHANCED_PATTERNS = [
     ParityPattern("division_int_check", r"\w+\s*//\s*2\s*\*\s*2\s*==\s*\w+", "any"),
     ParityPattern("division_float_check", r"\w+\s*/\s*2\s*==\s*int\s*\(\s*\w+\s*/\s*2\s*\)", "python"),
     
-    # 7. Recursion patterns
-    ParityPattern("recursion_parity", r"def\s+(?:is_?)?(?:even|odd)\s*\([^)]*\)\s*:(?:.*\n)*.*return.*(?:is_?)?(?:even|odd)\s*\([^)]*-\s*2", "python"),
+    # 7. Recursion patterns (ленивое .*? вместо (?:.*\n)*.* - без экспоненциального бэктрекинга)
+    ParityPattern("recursion_parity", r"def\s+(?:is_?)?(?:even|odd)\s*\([^)]*\)\s*:.*?return.*?(?:is_?)?(?:even|odd)\s*\([^)]*-\s*2", "python"),
     
     # 8. Lambda functions
     ParityPattern("lambda_modulo", r"lambda\s+\w+\s*:\s*\w+\s*%\s*2\s*(?:==|!=)\s*[01]", "python"),
@@ -126,3 +126,8 @@ class ParityAnalyzer:
         return found, count, {"method": "enhanced", "language": lang, "size": code_size, "patterns": patterns, "patterns_found": count}
 
 analyzer = ParityAnalyzer()
+
+
+def analyze(code: str) -> Tuple[bool, int, Dict[str, Any]]:
+    """Анализ глобальным экземпляром. Функция уровня модуля, чтобы её можно было отдать в пул процессов"""
+    return analyzer.analyze(code)
@@ -4,20 +4,20 @@ SysPet Game Logic Module
 """
 
 import re
-import psutil
-import time
 from dataclasses import dataclass, field, asdict
 from typing import Tuple, List, Dict, Any
 from enum import Enum
 from .analyzer import analyzer
+from .metrics import metrics
 
 # ===== КОНСТАНТЫ ИГРЫ =====
 XP_TO_NEXT_COURSE = 100
 MAX_WEIGHT_RAM = 1024 * 1024 * 1024 * 4
-UPDATE_INTERVAL = 1.0  # Обновление каждую секунду
+UPDATE_INTERVAL = 1.0  # Снятие системных метрик каждую секунду
 HUNGER_DECAY_INTERVAL = 10.0  # Голод уменьшается каждые 10 секунд
 HAPPINESS_DECAY_INTERVAL = 15.0  # Счастье уменьшается каждые 15 секунд
 FATIGUE_XP_INTERVAL = 5.0  # XP от усталости каждые 5 секунд
+IO_PRESSURE_THRESHOLD = 20.0  # PSI io "some avg10", % времени, выше которого питомец нервничает
 
 
 class PetStatus(Enum):
@@ -55,10 +55,6 @@ class SysPet:
         # === ВНУТРЕННЕЕ СОСТОЯНИЕ ===
         self._total_xp = 0
         self._code_fed_count = 0
-        self._last_update = time.time()
-        self._last_hunger_decay = time.time()
-        self._last_happiness_decay = time.time()
-        self._last_fatigue_xp = time.time()
 
     def to_dict(self) -> Dict[str, Any]:
         """Преобразование в словарь для JSON"""
@@ -107,7 +103,13 @@ class SysPet:
         Код без конструкций = -10 sanity
         """
         found, pattern_count, metadata = self.analyze_code(code)
+        return self.apply_feed(found, pattern_count, metadata)
 
+    def apply_feed(self, found: bool, pattern_count: int, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Применить результат анализа к питомцу.
+        Отделено от feed, чтобы анализ можно было выполнять вне event loop.
+        """
         if found:
             # Код содержит проверки чётности!
             hunger_restore = pattern_count * 20  # Каждый паттерн = +20 hunger
@@ -164,25 +166,23 @@ class SysPet:
     def update_from_system(self):
         """
         Обновить состояние питомца на основе системных метрик.
-        Вызывается периодически (каждую секунду).
+        Вызывается планировщиком каждые UPDATE_INTERVAL секунд.
+        Метрики берутся из cgroup контейнера (или psutil, если cgroup v2 нет).
         """
-        now = time.time()
-        delta = now - self._last_update
-
-        if delta < UPDATE_INTERVAL:
-            return
-
         # Получить системные метрики
         try:
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            ram_info = psutil.virtual_memory()
+            sample = metrics.sample()
 
             # === Влияние CPU на усталость ===
-            fatigue_increase = (cpu_percent / 100.0) * 5
+            fatigue_increase = (sample.cpu_percent / 100.0) * 5
             self.fatigue = min(100, self.fatigue + fatigue_increase)
 
             # === Влияние RAM на вес ===
-            self.weight = (ram_info.percent / 100.0) * 100
+            self.weight = (sample.memory_percent / 100.0) * 100
+
+            # === Давление IO: диск тормозит - питомец грустит ===
+            if sample.io_pressure > IO_PRESSURE_THRESHOLD:
+                self.happiness = max(0, self.happiness - 1)
 
             # === Общее здоровье ===
             if self.fatigue > 80:
@@ -200,29 +200,21 @@ class SysPet:
         except Exception as e:
             self.status_message = f"Ошибка системы: {str(e)[:20]}"
 
-        # === АВТОМАТИЧЕСКОЕ УМЕНЬШЕНИЕ ГОЛОДА ===
-        # Голод уменьшается на 1 каждые 10 секунд
-        if now - self._last_hunger_decay >= HUNGER_DECAY_INTERVAL:
-            self.hunger = max(0, self.hunger - 1)
-            self._last_hunger_decay = now
+    def decay_hunger(self):
+        """Голод уменьшается на 1 (каждые HUNGER_DECAY_INTERVAL секунд)"""
+        self.hunger = max(0, self.hunger - 1)
 
-        # === АВТОМАТИЧЕСКОЕ УМЕНЬШЕНИЕ СЧАСТЬЯ ===
-        # Счастье уменьшается на 1 каждые 15 секунд
-        if now - self._last_happiness_decay >= HAPPINESS_DECAY_INTERVAL:
-            self.happiness = max(0, self.happiness - 1)
-            self._last_happiness_decay = now
+    def decay_happiness(self):
+        """Счастье уменьшается на 1 (каждые HAPPINESS_DECAY_INTERVAL секунд)"""
+        self.happiness = max(0, self.happiness - 1)
 
-        # === XP ОТ УСТАЛОСТИ ===
-        # Когда fatigue >= 100, даём +1 XP каждые 5 секунд
+    def fatigue_xp(self):
+        """Когда fatigue >= 100, даём +1 XP (каждые FATIGUE_XP_INTERVAL секунд)"""
         if self.fatigue >= 100:
-            if now - self._last_fatigue_xp >= FATIGUE_XP_INTERVAL:
-                self.xp += 1
-                self._total_xp += 1
-                self._last_fatigue_xp = now
-                if self.xp >= XP_TO_NEXT_COURSE:
-                    self.evolve()
-
-        self._last_update = now
+            self.xp += 1
+            self._total_xp += 1
+            if self.xp >= XP_TO_NEXT_COURSE:
+                self.evolve()
 
     def rest(self):
         """Питомец отдыхает"""
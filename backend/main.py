@@ -14,17 +14,36 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
 
-from .logic import pet, SysPet
+from .logic import (
+    pet,
+    SysPet,
+    UPDATE_INTERVAL,
+    HUNGER_DECAY_INTERVAL,
+    HAPPINESS_DECAY_INTERVAL,
+    FATIGUE_XP_INTERVAL,
+)
+from .scheduler import scheduler, MissPolicy
+from .metrics import metrics
+from .analyzer import analyze
+from .admission import feed_admission, FeedAdmissionMiddleware, AdmissionRejected
 
 # ===== АСИНХРОННЫЙ GAME LOOP =====
 game_task = None
 
 
+def setup_scheduler():
+    """Зарегистрировать подсистемы питомца, каждую со своей частотой"""
+    # Метрики и XP не имеет смысла догонять пачкой - пропускаем
+    scheduler.every(UPDATE_INTERVAL, pet.update_from_system, name="sampling")
+    scheduler.every(FATIGUE_XP_INTERVAL, pet.fatigue_xp, name="fatigue_xp")
+    # Распад должен идти с честной частотой даже после подвисания
+    scheduler.every(HUNGER_DECAY_INTERVAL, pet.decay_hunger, name="hunger_decay", policy=MissPolicy.CATCH_UP)
+    scheduler.every(HAPPINESS_DECAY_INTERVAL, pet.decay_happiness, name="happiness_decay", policy=MissPolicy.CATCH_UP)
+
+
 async def game_loop():
     """Фоновый цикл обновления состояния питомца"""
-    while True:
-        pet.update_from_system()
-        await asyncio.sleep(1)  # Обновлять каждую секунду
+    await scheduler.run()
 
 
 @asynccontextmanager
@@ -36,6 +55,7 @@ async def lifespan(app: FastAPI):
     global game_task
 
     # Startup: запустить game loop
+    setup_scheduler()
     game_task = asyncio.create_task(game_loop())
     print("🎮 Game loop запущен!")
 
@@ -48,6 +68,8 @@ async def lifespan(app: FastAPI):
             await game_task
         except asyncio.CancelledError:
             pass
+    scheduler.clear()
+    feed_admission.shutdown()
     print("⛔ Game loop остановлен!")
 
 
@@ -60,6 +82,9 @@ app = FastAPI(
 )
 
 # ===== MIDDLEWARE =====
+# Контроль нагрузки на /api/feed (добавляется первым, чтобы CORS оборачивал и отказы)
+app.add_middleware(FeedAdmissionMiddleware, admission=feed_admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -145,6 +170,7 @@ async def feed_pet(request: Request, code: str | None = Form(None)):
     """
     Покормить питомца кодом.
     Form param: code (строка с кодом)
+    Анализ идёт через ограниченную очередь; при перегрузке - 429 с Retry-After.
     """
     if code is None:
         try:
@@ -157,10 +183,21 @@ async def feed_pet(request: Request, code: str | None = Form(None)):
     if not code or len(code) == 0:
         raise HTTPException(status_code=400, detail="Code cannot be empty")
 
-    result = pet.feed(code)
+    try:
+        found, pattern_count, metadata = await feed_admission.run(analyze, code)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.reason, headers=e.headers())
+
+    result = pet.apply_feed(found, pattern_count, metadata)
     return result
 
 
+@app.get("/api/feed/stats")
+async def get_feed_stats():
+    """Статистика контроля нагрузки: глубина очереди, отказы"""
+    return feed_admission.stats()
+
+
 @app.post("/api/rest")
 async def pet_rest():
     """Питомец отдыхает"""
@@ -195,17 +232,24 @@ async def pet_action(action: str = Form(...)):
 
 @app.get("/api/stats")
 async def get_system_stats():
-    """Получить системные статистики"""
+    """
+    Получить системные статистики.
+    Отдаёт последний замер планировщика, чтобы не сбивать дельты CPU/IO.
+    """
     try:
-        import psutil
-        cpu = psutil.cpu_percent(interval=0.1)
-        ram = psutil.virtual_memory()
+        sample = metrics.sample_data
 
         return {
-            "cpu_percent": cpu,
-            "ram_percent": ram.percent,
-            "ram_used_mb": round(ram.used / (1024 ** 2), 2),
-            "ram_total_mb": round(ram.total / (1024 ** 2), 2),
+            "source": sample.source,
+            "cpu_percent": sample.cpu_percent,
+            "host_cpu_percent": sample.host_cpu_percent,
+            "ram_percent": sample.memory_percent,
+            "ram_used_mb": round(sample.memory_used / (1024 ** 2), 2),
+            "ram_total_mb": round(sample.memory_total / (1024 ** 2), 2),
+            "io_read_bps": sample.io_read_bps,
+            "io_write_bps": sample.io_write_bps,
+            "cpu_pressure": sample.cpu_pressure,
+            "io_pressure": sample.io_pressure,
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -280,6 +324,8 @@ async def debug_info():
         "app_name": "SysPet",
         "version": "1.0.0",
         "game_task_running": game_task is not None and not game_task.done(),
+        "feed_admission": feed_admission.stats(),
+        "scheduler": scheduler.stats(),
         "pet": pet.to_dict(),
     }
 
@@ -0,0 +1,353 @@
+"""
+SysPet Metrics Module
+Лёгкий источник системных метрик: cgroup v2 контейнера + /proc/stat,
+с откатом на psutil вне контейнера, без cgroup v2 или для отсутствующих файлов.
+
+SYSPET_METRICS_SOURCE: auto (cgroup только в контейнере), cgroup, psutil.
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional
+
+import psutil
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+PROC_STAT = "/proc/stat"
+PROC_MEMINFO = "/proc/meminfo"
+READ_BUFFER_SIZE = 8192
+METRICS_SOURCE = os.environ.get("SYSPET_METRICS_SOURCE", "auto")
+
+
+class MetricsSample:
+    """Один снимок метрик. Объект переиспользуется между замерами"""
+
+    __slots__ = (
+        "source", "timestamp",
+        "cpu_percent", "host_cpu_percent",
+        "memory_used", "memory_total", "memory_percent",
+        "io_read_bps", "io_write_bps",
+        "cpu_pressure", "io_pressure",
+    )
+
+    def __init__(self, source: str):
+        self.source = source
+        self.timestamp = 0.0
+        self.cpu_percent = 0.0  # Процент от доступного контейнеру CPU
+        self.host_cpu_percent = 0.0
+        self.memory_used = 0
+        self.memory_total = 0
+        self.memory_percent = 0.0
+        self.io_read_bps = 0.0
+        self.io_write_bps = 0.0
+        self.cpu_pressure = 0.0  # PSI "some avg10", % времени с задержкой
+        self.io_pressure = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _StatFile:
+    """Файл, открытый один раз и перечитываемый через pread в общий буфер"""
+
+    def __init__(self, path: str, size: int = READ_BUFFER_SIZE):
+        self.fd = os.open(path, os.O_RDONLY)
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+
+    def read(self) -> memoryview:
+        n = os.preadv(self.fd, [self.buffer], 0)
+        return self.view[:n]
+
+    def close(self):
+        self.view.release()
+        os.close(self.fd)
+
+
+def _open_optional(path: str, size: int = READ_BUFFER_SIZE) -> Optional[_StatFile]:
+    try:
+        return _StatFile(path, size)
+    except OSError:
+        return None
+
+
+def _field(data, key: bytes) -> int:
+    """Значение 'key N' или 'key=N' из содержимого stat-файла (0, если нет)"""
+    raw = bytes(data)
+    start = raw.find(key)
+    while start != -1:
+        before = raw[start - 1:start] if start else b"\n"
+        if before in (b"\n", b" "):
+            start += len(key)
+            while start < len(raw) and raw[start] in b" \t=":
+                start += 1  # Пропускаем разделитель после ключа
+            end = start
+            while end < len(raw) and 48 <= raw[end] <= 57:
+                end += 1
+            return int(raw[start:end]) if end > start else 0
+        start = raw.find(key, start + 1)
+    return 0
+
+
+def _pressure_avg10(data) -> float:
+    """'some avg10=1.23 ...' из файла PSI"""
+    raw = bytes(data)
+    start = raw.find(b"avg10=")
+    if start == -1:
+        return 0.0
+    start += 6
+    end = raw.find(b" ", start)
+    return float(raw[start:end if end != -1 else len(raw)])
+
+
+def _io_totals(data):
+    """Суммарные rbytes/wbytes по всем устройствам из io.stat"""
+    read_total = 0
+    write_total = 0
+    for line in bytes(data).split(b"\n"):
+        for item in line.split(b" ")[1:]:
+            if item.startswith(b"rbytes="):
+                read_total += int(item[7:])
+            elif item.startswith(b"wbytes="):
+                write_total += int(item[7:])
+    return read_total, write_total
+
+
+def _psutil_memory(s: MetricsSample):
+    ram = psutil.virtual_memory()
+    s.memory_used = ram.used
+    s.memory_total = ram.total
+    s.memory_percent = ram.percent
+
+
+class _PsutilIO:
+    """Скорость IO по дельтам psutil.disk_io_counters()"""
+
+    def __init__(self):
+        self._last = None
+
+    def sample(self, s: MetricsSample, elapsed: float):
+        try:
+            io = psutil.disk_io_counters()
+        except (RuntimeError, OSError):
+            io = None
+        if io is None:
+            return
+        if self._last is not None and elapsed > 0:
+            s.io_read_bps = round((io.read_bytes - self._last.read_bytes) / elapsed, 1)
+            s.io_write_bps = round((io.write_bytes - self._last.write_bytes) / elapsed, 1)
+        self._last = io
+
+
+def in_container() -> bool:
+    """Признаки Docker/Podman/Kubernetes или собственного cgroup namespace"""
+    if os.path.exists("/.dockerenv") or os.path.exists("/run/.containerenv"):
+        return True
+    if "KUBERNETES_SERVICE_HOST" in os.environ or os.environ.get("container"):
+        return True
+    try:
+        with open("/proc/self/cgroup", "r") as f:
+            # Вне namespace процесс всегда во вложенной группе (user.slice, system.slice...)
+            return any(line.strip() == "0::/" for line in f)
+    except OSError:
+        return False
+
+
+def find_cgroup_dir() -> Optional[str]:
+    """Каталог cgroup v2 текущего процесса или None, если cgroup v2 нет"""
+    if not os.path.exists(os.path.join(CGROUP_ROOT, "cgroup.controllers")):
+        return None
+    try:
+        with open("/proc/self/cgroup", "r") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    relative = line[3:].strip().lstrip("/")
+                    candidate = os.path.join(CGROUP_ROOT, relative)
+                    if os.path.exists(os.path.join(candidate, "cpu.stat")):
+                        return candidate
+    except OSError:
+        pass
+    # С cgroup namespace собственная группа смонтирована прямо в корень
+    if os.path.exists(os.path.join(CGROUP_ROOT, "cpu.stat")):
+        return CGROUP_ROOT
+    return None
+
+
+class CgroupMetrics:
+    """
+    Метрики контейнера из cgroup v2; загрузка CPU хоста - из /proc/stat.
+    Память и IO берутся из psutil, если у группы нет соответствующих файлов
+    (корневая группа, контроллер не включён).
+    """
+
+    def __init__(self, cgroup_dir: str, proc_stat: str = PROC_STAT, proc_meminfo: str = PROC_MEMINFO):
+        self.cgroup_dir = cgroup_dir
+        self.sample_data = MetricsSample("cgroup")
+
+        def path(name: str) -> str:
+            return os.path.join(cgroup_dir, name)
+
+        self._cpu_stat = _StatFile(path("cpu.stat"))
+        self._memory_current = _open_optional(path("memory.current"), 64)
+        self._memory_stat = _open_optional(path("memory.stat"))
+        self._io_stat = _open_optional(path("io.stat"))
+        self._cpu_pressure = _open_optional(path("cpu.pressure"), 256)
+        self._io_pressure = _open_optional(path("io.pressure"), 256)
+        # Первая строка /proc/stat - суммарная по всем ядрам, остальное не читаем
+        self._proc_stat = _open_optional(proc_stat, 256)
+
+        self._io_fallback = _PsutilIO() if self._io_stat is None else None
+        if self._memory_current is None or self._io_stat is None:
+            self.sample_data.source = "cgroup+psutil"
+
+        self._cpu_limit = self._read_cpu_limit(path("cpu.max"))
+        self._memory_limit = self._read_memory_limit(path("memory.max"), proc_meminfo)
+
+        self._last_time = 0.0
+        self._last_usage_usec = 0
+        self._last_host_busy = 0
+        self._last_host_total = 0
+        self._last_io_read = 0
+        self._last_io_write = 0
+        self.sample()  # Базовая точка для дельт
+
+    @staticmethod
+    def _read_cpu_limit(path: str) -> float:
+        """Сколько ядер доступно контейнеру: квота cpu.max или affinity"""
+        try:
+            with open(path, "r") as f:
+                quota, period = f.read().split()[:2]
+            if quota != "max":
+                return max(0.01, int(quota) / int(period))
+        except (OSError, ValueError):
+            pass
+        try:
+            return float(len(os.sched_getaffinity(0)))
+        except AttributeError:
+            return float(os.cpu_count() or 1)
+
+    @staticmethod
+    def _read_memory_limit(path: str, proc_meminfo: str) -> int:
+        try:
+            with open(path, "r") as f:
+                value = f.read().strip()
+            if value != "max":
+                return int(value)
+        except (OSError, ValueError):
+            pass
+        with open(proc_meminfo, "rb") as f:
+            return _field(f.read(), b"MemTotal:") * 1024
+
+    def sample(self) -> MetricsSample:
+        s = self.sample_data
+        now = time.monotonic()
+        elapsed = now - self._last_time if self._last_time else 0.0
+
+        # === CPU контейнера ===
+        usage_usec = _field(self._cpu_stat.read(), b"usage_usec")
+        if elapsed > 0:
+            used = (usage_usec - self._last_usage_usec) / 1e6
+            s.cpu_percent = round(min(100.0, used / (elapsed * self._cpu_limit) * 100), 1)
+        self._last_usage_usec = usage_usec
+
+        # === CPU хоста ===
+        if self._proc_stat is not None:
+            fields = bytes(self._proc_stat.read()).split(b"\n", 1)[0].split()[1:]
+            values = [int(v) for v in fields]
+            total = sum(values[:8])  # user..steal; guest уже входит в user
+            idle = values[3] + (values[4] if len(values) > 4 else 0)
+            busy = total - idle
+            if total > self._last_host_total and self._last_host_total:
+                s.host_cpu_percent = round(
+                    (busy - self._last_host_busy) / (total - self._last_host_total) * 100, 1
+                )
+            self._last_host_busy = busy
+            self._last_host_total = total
+
+        # === Память (как working set: без неактивного page cache) ===
+        if self._memory_current is not None:
+            used = int(bytes(self._memory_current.read()))
+            if self._memory_stat is not None:
+                used = max(0, used - _field(self._memory_stat.read(), b"inactive_file"))
+            s.memory_used = used
+            s.memory_total = self._memory_limit
+            s.memory_percent = round(used / self._memory_limit * 100, 1) if self._memory_limit else 0.0
+        else:
+            _psutil_memory(s)
+
+        # === IO ===
+        if self._io_fallback is not None:
+            self._io_fallback.sample(s, elapsed)
+        else:
+            read_total, write_total = _io_totals(self._io_stat.read())
+            if elapsed > 0:
+                s.io_read_bps = round((read_total - self._last_io_read) / elapsed, 1)
+                s.io_write_bps = round((write_total - self._last_io_write) / elapsed, 1)
+            self._last_io_read = read_total
+            self._last_io_write = write_total
+
+        # === PSI ===
+        if self._cpu_pressure is not None:
+            s.cpu_pressure = _pressure_avg10(self._cpu_pressure.read())
+        if self._io_pressure is not None:
+            s.io_pressure = _pressure_avg10(self._io_pressure.read())
+
+        s.timestamp = now
+        self._last_time = now
+        return s
+
+    def close(self):
+        for stat_file in (
+            self._cpu_stat, self._memory_current, self._memory_stat,
+            self._io_stat, self._cpu_pressure, self._io_pressure, self._proc_stat,
+        ):
+            if stat_file is not None:
+                stat_file.close()
+
+
+class PsutilMetrics:
+    """Запасной источник через psutil (метрики всего хоста)"""
+
+    def __init__(self):
+        self.sample_data = MetricsSample("psutil")
+        self._last_time = 0.0
+        self._io = _PsutilIO()
+        self.sample()  # Базовая точка для дельт
+
+    def sample(self) -> MetricsSample:
+        s = self.sample_data
+        now = time.monotonic()
+        elapsed = now - self._last_time if self._last_time else 0.0
+
+        s.cpu_percent = psutil.cpu_percent(interval=None)
+        s.host_cpu_percent = s.cpu_percent
+        _psutil_memory(s)
+        self._io.sample(s, elapsed)
+
+        s.timestamp = now
+        self._last_time = now
+        return s
+
+    def close(self):
+        pass
+
+
+def create_metrics_source(mode: str = METRICS_SOURCE):
+    """
+    Выбрать источник метрик.
+    auto - cgroup v2 только внутри контейнера, на обычной машине нужен вид всего хоста;
+    cgroup - cgroup v2 всегда, если доступен; psutil - всегда psutil.
+    """
+    if mode == "psutil" or (mode == "auto" and not in_container()):
+        return PsutilMetrics()
+    cgroup_dir = find_cgroup_dir()
+    if cgroup_dir is not None:
+        try:
+            return CgroupMetrics(cgroup_dir)
+        except (OSError, ValueError):
+            pass
+    return PsutilMetrics()
+
+
+# ===== ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР =====
+metrics = create_metrics_source()
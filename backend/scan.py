@@ -0,0 +1,399 @@
+"""
+SysPet Repository Scanner
+Офлайн-сканер дерева исходников через ParityAnalyzer на пуле процессов.
+
+Запуск: python -m backend.scan <dir> [-o results.jsonl] [--feed-url URL]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .analyzer import analyzer, ENHANCED_PATTERNS, SIMPLE_PATTERNS, LARGE_INPUT_THRESHOLD
+
+# ===== КОНСТАНТЫ СКАНЕРА =====
+SNIFF_SIZE = 8 * 1024  # Сколько байт смотреть для определения бинарника
+MAX_FILE_SIZE = 10 * 1024 * 1024  # Файлы крупнее пропускаются
+MAX_SAMPLES_PER_FILE = 5  # Сколько совпавших фрагментов брать из файла для feed
+MAX_SAMPLE_LENGTH = 200  # Длина одного фрагмента в символах
+BATCH_SIZE = 16  # Файлов на одну задачу пула, снижает накладные расходы IPC
+BATCHES_PER_WORKER = 2  # Сколько пачек держать в полёте на процесс
+ALWAYS_SKIP_DIRS = {".git", ".hg", ".svn"}
+DEFAULT_FEED_URL = "http://localhost:8000/api/feed"
+
+
+# ===== .gitignore-ПРАВИЛА =====
+
+def _glob_to_regex(glob: str) -> str:
+    """Перевести gitignore-glob в регулярное выражение (без якорей)"""
+    out = []
+    i = 0
+    while i < len(glob):
+        c = glob[i]
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = glob.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < len(glob):
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRule:
+    def __init__(self, base: str, line: str):
+        self.base = base  # Каталог .gitignore относительно корня ("" = корень)
+        self.negate = line.startswith("!")
+        if self.negate:
+            line = line[1:]
+        self.dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # Паттерн со слешем в начале/середине привязан к своему каталогу
+        anchored = "/" in line
+        line = line.lstrip("/")
+        prefix = "" if anchored else "(?:.*/)?"
+        self.regex = re.compile(f"^{prefix}{_glob_to_regex(line)}$")
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        return self.regex.match(rel_path) is not None
+
+
+class IgnoreRules:
+    """Набор правил в духе .gitignore: побеждает последнее совпавшее правило"""
+
+    def __init__(self):
+        self.rules: List[IgnoreRule] = []
+
+    def add(self, line: str, base: str = ""):
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            return
+        self.rules.append(IgnoreRule(base, line))
+
+    def add_file(self, path: str, base: str = ""):
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    self.add(line, base)
+        except OSError:
+            pass
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        result = False
+        for rule in self.rules:
+            if rule.matches(rel_path, is_dir):
+                result = not rule.negate
+        return result
+
+
+def iter_source_files(root: str, rules: IgnoreRules, use_gitignore: bool = True) -> Iterator[Tuple[str, str]]:
+    """
+    Обойти дерево, уважая .gitignore в каждом каталоге (если use_gitignore).
+    Возвращает пары (абсолютный_путь, путь_относительно_корня)
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir
+
+        nested_ignore = os.path.join(dirpath, ".gitignore")
+        if use_gitignore and os.path.isfile(nested_ignore):
+            rules.add_file(nested_ignore, rel_dir)
+
+        def rel(name: str) -> str:
+            return f"{rel_dir}/{name}" if rel_dir else name
+
+        # Отсекаем игнорируемые каталоги, чтобы не спускаться в них
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in ALWAYS_SKIP_DIRS and not rules.ignored(rel(d), True)
+        )
+        for name in sorted(filenames):
+            rel_path = rel(name)
+            if rules.ignored(rel_path, False):
+                continue
+            full_path = os.path.join(dirpath, name)
+            if os.path.islink(full_path) or not os.path.isfile(full_path):
+                continue
+            yield full_path, rel_path
+
+
+# ===== АНАЛИЗ ОДНОГО ФАЙЛА (выполняется в воркере) =====
+
+def _extract_samples(code: str, metadata: Dict[str, Any]) -> List[str]:
+    """Вытащить совпавшие фрагменты кода, чтобы потом скормить их серверу"""
+    if metadata.get("method") == "enhanced":
+        names = set(metadata.get("patterns", []))
+        regexes = [(p.pattern, re.MULTILINE | re.DOTALL) for p in ENHANCED_PATTERNS if p.name in names]
+    else:
+        regexes = [(pattern, 0) for pattern, _ in SIMPLE_PATTERNS]
+
+    samples = []
+    for pattern, flags in regexes:
+        match = re.search(pattern, code, flags)
+        if match is None:
+            continue
+        # Берём физическую строку с началом совпадения: с DOTALL совпадение
+        # может растянуться на весь файл
+        start = code.rfind("\n", 0, match.start()) + 1
+        end = code.find("\n", match.start())
+        line = code[start:end if end != -1 else len(code)].strip()
+        samples.append(line[:MAX_SAMPLE_LENGTH])
+        if len(samples) >= MAX_SAMPLES_PER_FILE:
+            break
+    return samples
+
+
+def scan_file(job: Tuple[str, str]) -> Dict[str, Any]:
+    """Прочитать файл, отсеять бинарники и прогнать анализатор"""
+    full_path, rel_path = job
+    result: Dict[str, Any] = {"path": rel_path}
+    try:
+        size = os.path.getsize(full_path)
+        result["size"] = size
+        if size == 0:
+            result["skipped"] = "empty"
+            return result
+        if size > MAX_FILE_SIZE:
+            result["skipped"] = "too_large"
+            return result
+
+        with open(full_path, "rb") as f:
+            head = f.read(SNIFF_SIZE)
+            if b"\x00" in head:
+                result["skipped"] = "binary"
+                return result
+            code = (head + f.read()).decode("utf-8", errors="replace")
+    except OSError as e:
+        result["error"] = str(e)
+        return result
+
+    found, count, metadata = analyzer.analyze(code)
+    result.update({"found": found, "patterns_found": count, "analysis": metadata})
+    if found:
+        result["samples"] = _extract_samples(code, metadata)
+    return result
+
+
+def scan_batch(jobs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    return [scan_file(job) for job in jobs]
+
+
+def _batches(jobs: Iterator[Tuple[str, str]], size: int) -> Iterator[List[Tuple[str, str]]]:
+    batch = []
+    for job in jobs:
+        batch.append(job)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ===== АГРЕГАЦИЯ =====
+
+class ScanSummary:
+    def __init__(self, root: str, workers: int):
+        self.root = root
+        self.workers = workers
+        self.files_total = 0
+        self.files_analyzed = 0
+        self.files_matched = 0
+        self.patterns_total = 0
+        self.skipped: Counter = Counter()
+        self.errors = 0
+        self.pattern_counts: Counter = Counter()
+        self.languages: Counter = Counter()
+        self.methods: Counter = Counter()
+        self.samples: List[str] = []
+        self._started = time.monotonic()
+
+    def add(self, result: Dict[str, Any]):
+        self.files_total += 1
+        if "skipped" in result:
+            self.skipped[result["skipped"]] += 1
+            return
+        if "error" in result:
+            self.errors += 1
+            return
+
+        self.files_analyzed += 1
+        metadata = result["analysis"]
+        self.methods[metadata["method"]] += 1
+        if "language" in metadata:
+            self.languages[metadata["language"]] += 1
+        if result["found"]:
+            self.files_matched += 1
+            self.patterns_total += result["patterns_found"]
+            self.pattern_counts.update(metadata.get("patterns", []))
+            self.samples.extend(result.get("samples", []))
+
+    def feed_code(self) -> str:
+        """
+        Собрать из уникальных фрагментов код для /api/feed.
+        Размер держим ниже LARGE_INPUT_THRESHOLD, чтобы сервер применил enhanced-анализ.
+        """
+        lines: List[str] = []
+        size = 0
+        for sample in dict.fromkeys(self.samples):
+            if size + len(sample) + 1 > LARGE_INPUT_THRESHOLD:
+                continue  # Следующие фрагменты могут быть короче и влезть
+            lines.append(sample)
+            size += len(sample) + 1
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "root": self.root,
+            "workers": self.workers,
+            "elapsed_sec": round(time.monotonic() - self._started, 3),
+            "files_total": self.files_total,
+            "files_analyzed": self.files_analyzed,
+            "files_matched": self.files_matched,
+            "patterns_total": self.patterns_total,
+            "skipped": dict(self.skipped),
+            "errors": self.errors,
+            "pattern_counts": dict(self.pattern_counts.most_common()),
+            "languages": dict(self.languages),
+            "methods": dict(self.methods),
+        }
+
+
+def send_to_feed(url: str, code: str, timeout: float = 10.0) -> Dict[str, Any]:
+    """Отправить агрегированный код на /api/feed запущенного сервера"""
+    body = json.dumps({"code": code}).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+# ===== CLI =====
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.scan",
+        description="Параллельно просканировать дерево исходников через ParityAnalyzer",
+    )
+    parser.add_argument("root", help="Каталог для сканирования")
+    parser.add_argument("-o", "--output", default="-", help="Куда писать JSONL по файлам ('-' = stdout)")
+    parser.add_argument("--summary", default=None, help="Куда записать итоговый JSON (по умолчанию stderr)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="Число процессов")
+    parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                        help="Дополнительный gitignore-паттерн исключения (можно несколько)")
+    parser.add_argument("--ignore-file", action="append", default=[], metavar="PATH",
+                        help="Дополнительный файл с gitignore-паттернами")
+    parser.add_argument("--no-gitignore", action="store_true", help="Не читать .gitignore в дереве")
+    parser.add_argument("--feed", action="store_true", help=f"Отправить агрегат на {DEFAULT_FEED_URL}")
+    parser.add_argument("--feed-url", default=None, metavar="URL", help="Отправить агрегат на указанный feed-эндпоинт")
+    return parser
+
+
+def run_scan(root: str, rules: IgnoreRules, workers: int, out, use_gitignore: bool = True) -> ScanSummary:
+    summary = ScanSummary(root, workers)
+    jobs = iter_source_files(root, rules, use_gitignore)
+
+    if workers <= 1:
+        for result in map(scan_file, jobs):
+            summary.add(result)
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        return summary
+
+    # Скользящее окно пачек: обход дерева идёт параллельно анализу,
+    # результаты пишутся по мере готовности, а в памяти держится ограниченное число задач
+    window = workers * BATCHES_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in _batches(jobs, BATCH_SIZE):
+            pending.append(pool.submit(scan_batch, batch))
+            if len(pending) >= window:
+                _drain(pending.popleft(), summary, out)
+        while pending:
+            _drain(pending.popleft(), summary, out)
+    return summary
+
+
+def _drain(future, summary: ScanSummary, out):
+    for result in future.result():
+        summary.add(result)
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    root = os.path.abspath(args.root)
+    if not os.path.isdir(root):
+        print(f"❌ Not a directory: {root}", file=sys.stderr)
+        return 2
+
+    rules = IgnoreRules()
+    for path in args.ignore_file:
+        rules.add_file(path)
+    for pattern in args.exclude:
+        rules.add(pattern)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        summary = run_scan(root, rules, max(1, args.workers), out, not args.no_gitignore)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    report = summary.to_dict()
+    feed_url = args.feed_url or (DEFAULT_FEED_URL if args.feed else None)
+    if feed_url:
+        code = summary.feed_code()
+        if not code:
+            report["feed"] = {"sent": False, "reason": "no parity patterns found"}
+        else:
+            try:
+                response = send_to_feed(feed_url, code)
+                report["feed"] = {"sent": True, "url": feed_url, "response": response}
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                report["feed"] = {"sent": False, "url": feed_url, "error": str(e)}
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+SysPet Scheduler
+Периодические задачи на монотонных часах без накопления дрейфа.
+Сроки хранятся в куче, каждая задача привязана к своей сетке времени.
+"""
+
+import asyncio
+import heapq
+import inspect
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+JITTER_WINDOW = 256  # Сколько последних опозданий хранить для перцентилей
+MAX_CATCH_UP = 5  # Сколько пропущенных тиков подряд максимум догонять
+
+
+class MissPolicy(Enum):
+    """Что делать с тиками, пропущенными из-за долгого выполнения или паузы"""
+    CATCH_UP = "catch_up"  # Выполнить пропущенные тики подряд (до MAX_CATCH_UP)
+    SKIP = "skip"  # Пропустить и выровняться на следующий тик сетки
+
+
+class PeriodicTask:
+    def __init__(self, name: str, interval: float, callback: Callable[[], Any], policy: MissPolicy, start: float):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self.policy = policy
+        self.deadline = start + interval
+        self.cancelled = False
+
+        # === СТАТИСТИКА ===
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._catch_up_streak = 0
+        self._lateness: Deque[float] = deque(maxlen=JITTER_WINDOW)
+        self._max_lateness = 0.0
+        self._total_duration = 0.0
+        self._max_duration = 0.0
+
+    def record(self, lateness: float, duration: float):
+        self.runs += 1
+        self._lateness.append(lateness)
+        self._max_lateness = max(self._max_lateness, lateness)
+        self._total_duration += duration
+        self._max_duration = max(self._max_duration, duration)
+
+    def advance(self, now: float):
+        """Вычислить следующий срок от сетки, а не от момента завершения"""
+        next_deadline = self.deadline + self.interval
+        if next_deadline > now:
+            self._catch_up_streak = 0
+        elif self.policy is MissPolicy.CATCH_UP and self._catch_up_streak < MAX_CATCH_UP:
+            self._catch_up_streak += 1
+        else:
+            missed = int((now - next_deadline) // self.interval) + 1
+            next_deadline += missed * self.interval
+            self.skipped += missed
+            self._catch_up_streak = 0
+        self.deadline = next_deadline
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self._lateness)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "interval": self.interval,
+            "policy": self.policy.value,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "jitter_ms": {
+                "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+                "p50": round(percentile(0.5) * 1000, 3),
+                "p99": round(percentile(0.99) * 1000, 3),
+                "max": round(self._max_lateness * 1000, 3),
+            },
+            "duration_ms": {
+                "mean": round(self._total_duration / self.runs * 1000, 3) if self.runs else 0.0,
+                "max": round(self._max_duration * 1000, 3),
+            },
+        }
+
+
+class Scheduler:
+    """Планировщик периодических задач поверх asyncio на time.monotonic()"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.tasks: Dict[str, PeriodicTask] = {}
+        self._heap: List[Tuple[float, int, PeriodicTask]] = []
+        self._seq = 0
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def every(
+        self,
+        interval: float,
+        callback: Callable[[], Any],
+        name: Optional[str] = None,
+        policy: MissPolicy = MissPolicy.SKIP,
+    ) -> PeriodicTask:
+        """Зарегистрировать задачу, выполняемую каждые interval секунд"""
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        name = name or getattr(callback, "__name__", f"task-{self._seq}")
+        if name in self.tasks:
+            raise ValueError(f"Task already registered: {name}")
+
+        task = PeriodicTask(name, interval, callback, policy, self.clock())
+        self.tasks[name] = task
+        self._push(task)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return task
+
+    def cancel(self, name: str):
+        task = self.tasks.pop(name, None)
+        if task is not None:
+            task.cancelled = True  # Из кучи удаляется лениво
+
+    def clear(self):
+        """Снять все задачи (при остановке приложения)"""
+        for task in self.tasks.values():
+            task.cancelled = True
+        self.tasks.clear()
+        self._heap.clear()
+
+    def _push(self, task: PeriodicTask):
+        self._seq += 1
+        heapq.heappush(self._heap, (task.deadline, self._seq, task))
+
+    async def _run_task(self, task: PeriodicTask, now: float):
+        lateness = max(0.0, now - task.deadline)
+        try:
+            result = task.callback()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            task.errors += 1
+            task.last_error = str(e)[:200]
+        finished = self.clock()
+        task.record(lateness, finished - now)
+        task.advance(finished)
+
+    async def run(self):
+        """Основной цикл: спим до ближайшего срока, выполняем, переставляем в кучу"""
+        self._wakeup = asyncio.Event()
+        while True:
+            if not self._heap:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            deadline, _, task = self._heap[0]
+            if task.cancelled:
+                heapq.heappop(self._heap)
+                continue
+
+            delay = deadline - self.clock()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue  # Куча могла измениться, перепроверяем вершину
+
+            heapq.heappop(self._heap)
+            await self._run_task(task, self.clock())
+            if not task.cancelled:
+                self._push(task)
+            # Отдать управление event loop, даже если следующие задачи уже просрочены
+            await asyncio.sleep(0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: task.stats() for name, task in self.tasks.items()}
+
+
+# ===== ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР =====
+scheduler = Scheduler()
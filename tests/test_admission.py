@@ -0,0 +1,155 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.admission import AnalysisError, AdmissionRejected, FeedAdmission, TokenBucket
+from backend.analyzer import analyze
+
+
+def test_token_bucket_burst_then_refill():
+    bucket = TokenBucket(rate=2.0, burst=3)
+    now = bucket.updated
+    assert [bucket.take(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take(now) == pytest.approx(0.5)
+    assert bucket.take(now + 0.5) == 0.0
+
+
+def test_check_rate_rejects_with_retry_after():
+    admission = FeedAdmission(rate=1.0, burst=2)
+    admission.check_rate("a")
+    admission.check_rate("a")
+    with pytest.raises(AdmissionRejected) as e:
+        admission.check_rate("a")
+    assert e.value.status_code == 429
+    assert e.value.headers() == {"Retry-After": "1"}
+    admission.check_rate("b")  # У другого клиента своя корзина
+    assert admission.stats()["rejected"] == {"rate_limited": 1}
+
+
+def test_body_size_limit():
+    admission = FeedAdmission(max_body=10)
+    admission.check_body_size(10)
+    with pytest.raises(AdmissionRejected) as e:
+        admission.check_body_size(11)
+    assert e.value.status_code == 413
+
+
+async def _run_all(admission, calls):
+    async def one(fn, *args):
+        try:
+            return await admission.run(fn, *args)
+        except AdmissionRejected as e:
+            return e.status_code, e.reason
+    try:
+        return await asyncio.gather(*[one(fn, *args) for fn, *args in calls])
+    finally:
+        admission.shutdown()
+
+
+def test_queue_full_rejects_excess():
+    admission = FeedAdmission(max_concurrency=1, max_queue=1, rate=0)
+    results = asyncio.run(_run_all(admission, [(time.sleep, 0.3)] * 3))
+    assert results[:2] == [None, None]
+    assert results[2] == (429, "Analysis queue is full")
+
+
+def test_queue_timeout():
+    admission = FeedAdmission(max_concurrency=1, max_queue=4, queue_timeout=0.1, job_timeout=10, rate=0)
+    results = asyncio.run(_run_all(admission, [(time.sleep, 1.0)] * 2))
+    assert results[0] is None
+    assert results[1] == (429, "Timed out waiting in analysis queue")
+
+
+def test_job_timeout_kills_worker_and_pool_recovers():
+    admission = FeedAdmission(max_concurrency=1, job_timeout=2.0, rate=0)
+
+    async def scenario():
+        try:
+            with pytest.raises(AdmissionRejected) as e:
+                await admission.run(time.sleep, 30)
+            assert e.value.status_code == 422
+            return await admission.run(analyze, "if n % 2 == 0: pass")
+        finally:
+            admission.shutdown()
+
+    found, count, _ = asyncio.run(scenario())
+    assert found and count >= 1
+    assert admission.stats()["timed_out"] == 1
+    assert admission.stats()["worker_restarts"] == 1
+    assert admission.stats()["completed"] == 1
+
+
+def test_job_timeout_kills_only_its_worker():
+    admission = FeedAdmission(max_concurrency=2, job_timeout=2.0, rate=0)
+
+    async def scenario():
+        try:
+            # Прогрев: два воркера, чтобы запуск процессов не попал в замер
+            await asyncio.gather(admission.run(analyze, "x"), admission.run(analyze, "y"))
+
+            async def sibling():
+                await asyncio.sleep(1.0)
+                # Ещё выполняется, когда соседний воркер убивают по таймауту
+                return await admission.run(time.sleep, 1.5)
+
+            return await asyncio.gather(admission.run(time.sleep, 30), sibling(), return_exceptions=True)
+        finally:
+            admission.shutdown()
+
+    hung, sibling = asyncio.run(scenario())
+    assert isinstance(hung, AdmissionRejected) and hung.status_code == 422
+    assert sibling is None
+    stats = admission.stats()
+    assert (stats["completed"], stats["timed_out"], stats["worker_restarts"]) == (3, 1, 1)
+
+
+def test_task_exception_keeps_worker():
+    admission = FeedAdmission(max_concurrency=1, rate=0)
+
+    async def scenario():
+        try:
+            with pytest.raises(AnalysisError):
+                await admission.run(int, "not a number")
+            return await admission.run(int, "42")
+        finally:
+            admission.shutdown()
+
+    assert asyncio.run(scenario()) == 42
+    stats = admission.stats()
+    assert (stats["completed"], stats["failed"], stats["worker_restarts"]) == (1, 1, 0)
+
+
+def test_cpu_bound_job_does_not_block_event_loop():
+    admission = FeedAdmission(max_concurrency=1, job_timeout=30, rate=0)
+
+    async def scenario():
+        # Прогрев пула, чтобы не мерить запуск процесса
+        await admission.run(analyze, "x")
+        max_gap = 0.0
+        done = False
+
+        async def ticker():
+            nonlocal max_gap
+            last = time.monotonic()
+            while not done:
+                await asyncio.sleep(0.01)
+                now = time.monotonic()
+                max_gap = max(max_gap, now - last)
+                last = now
+
+        tick = asyncio.create_task(ticker())
+        # sum по range держит GIL всё время вычисления
+        await admission.run(sum, range(30_000_000))
+        done = True
+        await tick
+        admission.shutdown()
+        return max_gap
+
+    assert asyncio.run(scenario()) < 0.2
+
+
+def test_recursion_pattern_has_no_catastrophic_backtracking():
+    started = time.monotonic()
+    analyze("def is_even(n):\n" + "x\n" * 5000)
+    assert time.monotonic() - started < 1.0
@@ -0,0 +1,142 @@
+import pytest
+
+from backend import metrics as metrics_module
+from backend.metrics import (
+    CgroupMetrics,
+    PsutilMetrics,
+    _field,
+    _io_totals,
+    _pressure_avg10,
+    create_metrics_source,
+)
+
+
+class FakeMonotonic:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeMonotonic()
+    monkeypatch.setattr(metrics_module.time, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def proc(tmp_path):
+    stat = tmp_path / "stat"
+    stat.write_text("cpu  100 0 100 700 100 0 0 0 0 0\ncpu0 1 2 3 4\n")
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text("MemTotal:        1024000 kB\nMemFree:          512000 kB\n")
+    return stat, meminfo
+
+
+def make_cgroup(path, **files):
+    path.mkdir()
+    for name, content in files.items():
+        (path / name.replace("_", ".", 1)).write_text(content)
+    return path
+
+
+def test_field_parser():
+    data = b"usage_usec 1500\nuser_usec 1000\n"
+    assert _field(data, b"usage_usec") == 1500
+    assert _field(data, b"user_usec") == 1000
+    assert _field(b"active_file 5\ninactive_file 7\n", b"inactive_file") == 7
+    assert _field(b"active_file 5\ninactive_file 7\n", b"active_file") == 5
+    assert _field(b"MemTotal:        1024 kB\n", b"MemTotal:") == 1024
+    assert _field(b"other 1\n", b"missing") == 0
+
+
+def test_pressure_parser():
+    data = b"some avg10=12.50 avg60=1.00 avg300=0.00 total=1\nfull avg10=3.00 avg60=0.00 avg300=0.00 total=0\n"
+    assert _pressure_avg10(data) == 12.5
+    assert _pressure_avg10(b"") == 0.0
+
+
+def test_io_stat_parser():
+    data = b"8:0 rbytes=100 wbytes=200 rios=1 wios=2\n8:16 rbytes=5 wbytes=0 rios=1 wios=0\n"
+    assert _io_totals(data) == (105, 200)
+    assert _io_totals(b"") == (0, 0)
+
+
+def test_cgroup_sample(tmp_path, proc, clock):
+    stat, meminfo = proc
+    cgroup = make_cgroup(
+        tmp_path / "cg",
+        cpu_stat="usage_usec 1000000\n",
+        cpu_max="50000 100000\n",
+        memory_current="104857600\n",
+        memory_max="209715200\n",
+        memory_stat="anon 1\ninactive_file 52428800\n",
+        io_stat="8:0 rbytes=0 wbytes=0\n",
+        cpu_pressure="some avg10=12.50 avg60=0 avg300=0 total=1\n",
+        io_pressure="some avg10=33.10 avg60=0 avg300=0 total=1\n",
+    )
+    source = CgroupMetrics(str(cgroup), str(stat), str(meminfo))
+
+    (cgroup / "cpu.stat").write_text("usage_usec 1250000\n")
+    (cgroup / "io.stat").write_text("8:0 rbytes=1000 wbytes=3000\n")
+    stat.write_text("cpu  200 0 200 800 100 0 0 0 0 0\n")
+    clock.now += 1.0
+    s = source.sample()
+    source.close()
+
+    assert s.source == "cgroup"
+    assert s.cpu_percent == 50.0  # 0.25с CPU за 1с при квоте 0.5 ядра
+    assert s.host_cpu_percent == 66.7  # busy +200 из +300
+    assert s.memory_used == 52428800
+    assert s.memory_total == 209715200
+    assert s.memory_percent == 25.0
+    assert (s.io_read_bps, s.io_write_bps) == (1000.0, 3000.0)
+    assert (s.cpu_pressure, s.io_pressure) == (12.5, 33.1)
+
+
+def test_unlimited_memory_uses_meminfo(tmp_path, proc, clock):
+    stat, meminfo = proc
+    cgroup = make_cgroup(
+        tmp_path / "cg",
+        cpu_stat="usage_usec 0\n",
+        memory_current="524288000\n",
+        memory_max="max\n",
+        io_stat="",
+    )
+    s = CgroupMetrics(str(cgroup), str(stat), str(meminfo)).sample()
+    assert s.memory_total == 1024000 * 1024
+    assert s.memory_percent == 50.0
+
+
+def test_missing_memory_and_io_fall_back_to_psutil(tmp_path, proc, clock):
+    stat, meminfo = proc
+    cgroup = make_cgroup(tmp_path / "cg", cpu_stat="usage_usec 0\n")
+    s = CgroupMetrics(str(cgroup), str(stat), str(meminfo)).sample()
+    assert s.source == "cgroup+psutil"
+    assert s.memory_total > 0
+    assert s.memory_percent > 0
+
+
+def test_psutil_source_has_baseline_sample():
+    source = PsutilMetrics()
+    assert source.sample_data.timestamp > 0
+    assert source.sample_data.memory_total > 0
+
+
+def test_source_selection(tmp_path, proc, monkeypatch):
+    stat, meminfo = proc
+    cgroup = make_cgroup(tmp_path / "cg", cpu_stat="usage_usec 0\n")
+    monkeypatch.setattr(metrics_module, "find_cgroup_dir", lambda: str(cgroup))
+
+    monkeypatch.setattr(metrics_module, "in_container", lambda: False)
+    assert isinstance(create_metrics_source("auto"), PsutilMetrics)
+    assert isinstance(create_metrics_source("cgroup"), CgroupMetrics)
+
+    monkeypatch.setattr(metrics_module, "in_container", lambda: True)
+    assert isinstance(create_metrics_source("auto"), CgroupMetrics)
+    assert isinstance(create_metrics_source("psutil"), PsutilMetrics)
+
+    monkeypatch.setattr(metrics_module, "find_cgroup_dir", lambda: None)
+    assert isinstance(create_metrics_source("cgroup"), PsutilMetrics)
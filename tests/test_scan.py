@@ -0,0 +1,114 @@
+import io
+import json
+
+from backend.scan import (
+    IgnoreRules,
+    ScanSummary,
+    MAX_SAMPLE_LENGTH,
+    _extract_samples,
+    build_parser,
+    run_scan,
+    scan_file,
+)
+from backend.analyzer import LARGE_INPUT_THRESHOLD
+
+
+def make_rules(*lines, base=""):
+    rules = IgnoreRules()
+    for line in lines:
+        rules.add(line, base)
+    return rules
+
+
+def test_unanchored_pattern_matches_at_any_depth():
+    rules = make_rules("*.log")
+    assert rules.ignored("a.log", False)
+    assert rules.ignored("deep/dir/a.log", False)
+    assert not rules.ignored("a.py", False)
+
+
+def test_anchored_pattern_matches_only_from_base():
+    rules = make_rules("/build")
+    assert rules.ignored("build", True)
+    assert not rules.ignored("src/build", True)
+
+    rules = make_rules("docs/*.md")
+    assert rules.ignored("docs/a.md", False)
+    assert not rules.ignored("x/docs/a.md", False)
+
+
+def test_double_star():
+    rules = make_rules("**/cache", "logs/**")
+    assert rules.ignored("cache", True)
+    assert rules.ignored("a/b/cache", True)
+    assert rules.ignored("logs/x/y.txt", False)
+    assert not rules.ignored("logs", True)
+
+
+def test_negation_last_rule_wins():
+    rules = make_rules("*.log", "!keep.log")
+    assert rules.ignored("a.log", False)
+    assert not rules.ignored("keep.log", False)
+
+
+def test_dir_only_pattern_skips_files():
+    rules = make_rules("out/")
+    assert rules.ignored("out", True)
+    assert not rules.ignored("out", False)
+
+
+def test_nested_rules_apply_below_their_base():
+    rules = make_rules("c.c", base="sub")
+    assert rules.ignored("sub/c.c", False)
+    assert not rules.ignored("c.c", False)
+
+
+def test_sample_is_cut_to_match_line():
+    # list_comp_parity с DOTALL растягивается до конца файла
+    code = "x = [i for i in y if i % 2]\n" + "pad = 1\n" * 1000
+    samples = _extract_samples(code, {"method": "enhanced", "patterns": ["list_comp_parity"]})
+    assert samples == ["x = [i for i in y if i % 2]"]
+
+
+def test_sample_length_is_capped():
+    code = "if n % 2 == 0: " + "a" * 5000
+    samples = _extract_samples(code, {"method": "simple"})
+    assert samples and all(len(sample) <= MAX_SAMPLE_LENGTH for sample in samples)
+
+
+def test_feed_code_skips_oversized_samples():
+    summary = ScanSummary("/", 1)
+    summary.samples = ["a" * LARGE_INPUT_THRESHOLD, "n % 2 == 0"]
+    assert summary.feed_code() == "n % 2 == 0"
+
+
+def test_scan_file_skips_binary_and_empty(tmp_path):
+    binary = tmp_path / "bin.dat"
+    binary.write_bytes(b"\x00\x01\x02")
+    empty = tmp_path / "empty.py"
+    empty.write_bytes(b"")
+    assert scan_file((str(binary), "bin.dat"))["skipped"] == "binary"
+    assert scan_file((str(empty), "empty.py"))["skipped"] == "empty"
+
+
+def test_run_scan_honors_gitignore(tmp_path):
+    (tmp_path / ".gitignore").write_text("build/\n*.log\n")
+    (tmp_path / "a.py").write_text("if x % 2 == 0:\n    pass\n")
+    (tmp_path / "b.log").write_text("x % 2 == 0\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "c.py").write_text("x % 2 == 0\n")
+
+    for workers in (1, 2):
+        out = io.StringIO()
+        summary = run_scan(str(tmp_path), IgnoreRules(), workers, out)
+        paths = [json.loads(line)["path"] for line in out.getvalue().splitlines()]
+        assert paths == [".gitignore", "a.py"]
+        assert summary.files_matched == 1
+
+
+def test_feed_flags_do_not_swallow_root():
+    args = build_parser().parse_args(["--feed", "repo"])
+    assert args.root == "repo" and args.feed and args.feed_url is None
+
+    args = build_parser().parse_args(["--feed-url", "http://h/api/feed", "repo"])
+    assert args.root == "repo" and args.feed_url == "http://h/api/feed"
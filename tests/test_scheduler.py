@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.scheduler import MAX_CATCH_UP, MissPolicy, PeriodicTask, Scheduler
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_for(scheduler: Scheduler, seconds: float):
+    async def scenario():
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(seconds)
+        task.cancel()
+    asyncio.run(scenario())
+
+
+def test_advance_keeps_grid_when_on_time():
+    task = PeriodicTask("t", 1.0, lambda: None, MissPolicy.SKIP, start=0.0)
+    task.advance(1.3)  # Выполнение заняло 0.3с, но следующий срок - по сетке
+    assert task.deadline == 2.0
+    assert task.skipped == 0
+
+
+def test_skip_realigns_to_next_grid_tick():
+    task = PeriodicTask("t", 1.0, lambda: None, MissPolicy.SKIP, start=0.0)
+    task.advance(4.5)
+    assert task.deadline == 5.0
+    assert task.skipped == 3
+
+
+def test_catch_up_is_capped():
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock)
+    runs = []
+    scheduler.every(1.0, lambda: runs.append(clock.now), name="decay", policy=MissPolicy.CATCH_UP)
+    clock.now = 10.0  # Пропущены тики 1..10
+
+    run_for(scheduler, 0.05)
+
+    stats = scheduler.stats()["decay"]
+    assert stats["runs"] == MAX_CATCH_UP + 1
+    assert stats["skipped"] == 10 - (MAX_CATCH_UP + 1)
+    assert scheduler.tasks["decay"].deadline == 11.0
+
+
+def test_skip_policy_runs_once_after_stall():
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock)
+    scheduler.every(1.0, lambda: None, name="sampling")
+    clock.now = 10.0
+
+    run_for(scheduler, 0.05)
+
+    stats = scheduler.stats()["sampling"]
+    assert stats["runs"] == 1
+    assert stats["skipped"] == 9
+    assert stats["jitter_ms"]["max"] == pytest.approx(9000.0)
+
+
+def test_errors_are_counted_and_loop_survives():
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock)
+    scheduler.every(1.0, lambda: 1 / 0, name="broken")
+    ok = scheduler.every(1.0, lambda: None, name="ok")
+    clock.now = 1.0
+
+    run_for(scheduler, 0.05)
+
+    assert scheduler.stats()["broken"]["errors"] == 1
+    assert "division by zero" in scheduler.stats()["broken"]["last_error"]
+    assert ok.runs == 1
+
+
+def test_awaitable_callbacks_are_awaited():
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock)
+    done = []
+
+    async def broadcast():
+        await asyncio.sleep(0)
+        done.append(True)
+
+    scheduler.every(1.0, broadcast, name="broadcast")
+    clock.now = 1.0
+    run_for(scheduler, 0.05)
+    assert done == [True]
+
+
+def test_cancel_and_duplicate_names():
+    scheduler = Scheduler(clock=FakeClock())
+    scheduler.every(1.0, lambda: None, name="a")
+    with pytest.raises(ValueError):
+        scheduler.every(1.0, lambda: None, name="a")
+    with pytest.raises(ValueError):
+        scheduler.every(0, lambda: None, name="b")
+    scheduler.cancel("a")
+    assert "a" not in scheduler.stats()
+    scheduler.every(1.0, lambda: None, name="a")
+
+
+def test_no_drift_with_real_clock():
+    scheduler = Scheduler()
+    ticks = []
+    started = time.monotonic()
+    scheduler.every(0.05, lambda: (ticks.append(time.monotonic() - started), time.sleep(0.02)), name="work")
+
+    run_for(scheduler, 0.53)
+
+    assert len(ticks) == 10
+    # Время выполнения не накапливается: 10-й тик всё ещё около 0.5с
+    assert ticks[-1] == pytest.approx(0.5, abs=0.03)